@@ -370,9 +370,9 @@ def get_plan_data_by_remote_realm() -> dict[int, dict[int, RemoteActivityPlanDat
 
 def get_remote_realm_user_counts(
     event_time: datetime | None = None,
-) -> dict[int, RemoteCustomerUserCount]:  # nocoverage
+) -> dict[int, RemoteCustomerUserCount]:
     user_counts_by_realm: dict[int, RemoteCustomerUserCount] = {}
-    for log in (
+    for remote_realm_id, extra_data in (
         RemoteRealmAuditLog.objects.filter(
             event_type__in=RemoteRealmAuditLog.SYNCED_BILLING_EVENTS,
             event_time__lte=timezone_now() if event_time is None else event_time,
@@ -387,19 +387,24 @@ def get_remote_realm_user_counts(
         .exclude(extra_data={})
         .order_by("remote_realm", "-event_time")
         .distinct("remote_realm")
-        .select_related("remote_realm")
+        .values_list("remote_realm_id", "extra_data")
+        # There is a row per remote realm, so stream them rather than
+        # loading them all into memory at once.
+        .iterator(chunk_size=200)
     ):
-        assert log.remote_realm is not None
-        user_counts_by_realm[log.remote_realm.id] = get_remote_customer_user_count([log])
+        assert remote_realm_id is not None
+        user_counts_by_realm[remote_realm_id] = get_remote_customer_user_count([extra_data])
 
     return user_counts_by_realm
 
 
-def get_remote_server_audit_logs(
+def get_remote_server_audit_log_extra_data(
     event_time: datetime | None = None,
-) -> dict[int, list[RemoteRealmAuditLog]]:
-    logs_per_server: dict[int, list[RemoteRealmAuditLog]] = defaultdict(list)
-    for log in (
+) -> dict[int, list[dict[str, Any]]]:
+    # Returns the extra_data of the latest audit log for each realm on
+    # each server, grouped by server ID.
+    extra_data_per_server: dict[int, list[dict[str, Any]]] = defaultdict(list)
+    for server_id, extra_data in (
         RemoteRealmAuditLog.objects.filter(
             event_type__in=RemoteRealmAuditLog.SYNCED_BILLING_EVENTS,
             event_time__lte=timezone_now() if event_time is None else event_time,
@@ -413,8 +418,8 @@ def get_remote_server_audit_logs(
         .exclude(extra_data={})
         .order_by("server_id", "realm_id", "-event_time")
         .distinct("server_id", "realm_id")
-        .select_related("server")
+        .values_list("server_id", "extra_data")
     ):
-        logs_per_server[log.server.id].append(log)
+        extra_data_per_server[server_id].append(extra_data)
 
-    return logs_per_server
+    return extra_data_per_server
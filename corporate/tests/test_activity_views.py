@@ -4,7 +4,10 @@ from unittest import mock
 
 from django.utils.timezone import now as timezone_now
 
-from corporate.lib.activity import get_remote_server_audit_logs
+from corporate.lib.activity import (
+    get_remote_realm_user_counts,
+    get_remote_server_audit_log_extra_data,
+)
 from corporate.lib.stripe import add_months
 from corporate.models.customers import Customer
 from corporate.models.licenses import LicenseLedger
@@ -231,11 +234,79 @@ class ActivityTest(ZulipTestCase):
         self.assertEqual(remote_server_counts.guest_user_count, 16)
 
         # Used in remote activity view code
-        server_logs = get_remote_server_audit_logs()
-        remote_activity_counts = get_remote_customer_user_count(server_logs[server_id])
+        server_audit_log_extra_data = get_remote_server_audit_log_extra_data()
+        remote_activity_counts = get_remote_customer_user_count(
+            server_audit_log_extra_data[server_id]
+        )
         self.assertEqual(remote_activity_counts.non_guest_user_count, 73)
         self.assertEqual(remote_activity_counts.guest_user_count, 16)
 
+        # An audit log missing its user counts is an error, rather
+        # than silently counting zero users for that realm.
+        RemoteRealmAuditLog.objects.create(
+            server_id=server_id,
+            realm_id=100,
+            event_type=AuditLogEventType.USER_CREATED,
+            event_time=event_time,
+            extra_data={"unrelated": 1},
+        )
+        with self.assertRaisesRegex(AssertionError, "missing user role counts"):
+            get_remote_server_guest_and_non_guest_count(
+                server_id=server_id, event_time=timezone_now()
+            )
+
+    def test_get_remote_realm_user_counts(self) -> None:
+        remote_realm = RemoteRealm.objects.get(name="Lear & Co.")
+
+        def humans_count_extra_data(member_count: int, guest_count: int) -> dict[str, object]:
+            return {
+                RemoteRealmAuditLog.ROLE_COUNT: {
+                    RemoteRealmAuditLog.ROLE_COUNT_HUMANS: {
+                        str(UserProfile.ROLE_REALM_OWNER): 1,
+                        str(UserProfile.ROLE_MEMBER): member_count,
+                        str(UserProfile.ROLE_GUEST): guest_count,
+                    }
+                }
+            }
+
+        RemoteRealmAuditLog.objects.bulk_create(
+            [
+                RemoteRealmAuditLog(
+                    server=remote_realm.server,
+                    remote_realm=remote_realm,
+                    event_type=AuditLogEventType.USER_CREATED,
+                    event_time=timezone_now() - timedelta(days=2),
+                    extra_data=humans_count_extra_data(member_count=5, guest_count=2),
+                ),
+                RemoteRealmAuditLog(
+                    server=remote_realm.server,
+                    remote_realm=remote_realm,
+                    event_type=AuditLogEventType.USER_CREATED,
+                    event_time=timezone_now() - timedelta(days=1),
+                    extra_data=humans_count_extra_data(member_count=9, guest_count=3),
+                ),
+                # Audit logs with empty extra_data are ignored.
+                RemoteRealmAuditLog(
+                    server=remote_realm.server,
+                    remote_realm=remote_realm,
+                    event_type=AuditLogEventType.USER_CREATED,
+                    event_time=timezone_now() - timedelta(hours=1),
+                    extra_data={},
+                ),
+            ]
+        )
+
+        # The latest audit log with user counts is used.
+        user_counts = get_remote_realm_user_counts()[remote_realm.id]
+        self.assertEqual(user_counts.non_guest_user_count, 10)
+        self.assertEqual(user_counts.guest_user_count, 3)
+
+        user_counts = get_remote_realm_user_counts(
+            event_time=timezone_now() - timedelta(days=1, hours=12)
+        )[remote_realm.id]
+        self.assertEqual(user_counts.non_guest_user_count, 6)
+        self.assertEqual(user_counts.guest_user_count, 2)
+
     def test_remote_activity_with_robust_data(self) -> None:
         def add_plan(customer: Customer, tier: int, fixed_price: bool = False) -> None:
             if fixed_price:
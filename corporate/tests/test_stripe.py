@@ -103,6 +103,7 @@ from zilencer.models import (
     RemoteServerBillingUser,
     RemoteZulipServer,
     RemoteZulipServerAuditLog,
+    has_stale_audit_log,
 )
 
 if TYPE_CHECKING:
@@ -6701,6 +6702,30 @@ class TestRemoteServerBillingSession(StripeTestCase):
         ):
             billing_session.get_audit_log_event(event_type=fake_audit_log)
 
+    def test_stale_audit_log(self) -> None:
+        servers = [
+            RemoteZulipServer.objects.create(
+                uuid=str(uuid.uuid4()),
+                api_key="magic_secret_api_key",
+                hostname=f"demo{i}.example.com",
+                contact_email="email@example.com",
+                last_audit_log_update=last_audit_log_update,
+            )
+            for i, last_audit_log_update in enumerate(
+                [None, timezone_now() - timedelta(days=5), timezone_now() - timedelta(days=1)]
+            )
+        ]
+        self.assertEqual([has_stale_audit_log(server) for server in servers], [True, True, False])
+
+        # Updating last_audit_log_update is reflected immediately.
+        servers[1].last_audit_log_update = timezone_now()
+        self.assertFalse(has_stale_audit_log(servers[1]))
+
+        # Audit logs become stale as time passes, even for the same object.
+        with time_machine.travel(timezone_now() + timedelta(days=3), tick=False):
+            self.assertTrue(has_stale_audit_log(servers[1]))
+            self.assertTrue(has_stale_audit_log(servers[2]))
+
     def test_get_customer(self) -> None:
         server_uuid = str(uuid.uuid4())
         remote_server = RemoteZulipServer.objects.create(
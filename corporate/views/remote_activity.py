@@ -11,7 +11,7 @@ from corporate.lib.activity import (
     get_plan_data_by_remote_server,
     get_query_data,
     get_remote_realm_user_counts,
-    get_remote_server_audit_logs,
+    get_remote_server_audit_log_extra_data,
     make_table,
     remote_installation_stats_link,
     remote_installation_support_link,
@@ -159,7 +159,7 @@ def get_remote_server_activity(request: HttpRequest) -> HttpResponse:
     rows = get_query_data(query)
     plan_data_by_remote_server = get_plan_data_by_remote_server()
     plan_data_by_remote_server_and_realm = get_plan_data_by_remote_realm()
-    audit_logs_by_remote_server = get_remote_server_audit_logs()
+    audit_log_extra_data_by_remote_server = get_remote_server_audit_log_extra_data()
     remote_realm_user_counts = get_remote_realm_user_counts()
 
     total_row = []
@@ -216,11 +216,11 @@ def get_remote_server_activity(request: HttpRequest) -> HttpResponse:
         # Get plan, revenue and user count data for row
         if realm_id is None:
             plan_data = plan_data_by_remote_server.get(server_id)
-            audit_log_list = audit_logs_by_remote_server.get(server_id)
-            if audit_log_list is None:
+            audit_log_extra_data = audit_log_extra_data_by_remote_server.get(server_id)
+            if audit_log_extra_data is None:
                 user_counts = None  # nocoverage
             else:
-                user_counts = get_remote_customer_user_count(audit_log_list)
+                user_counts = get_remote_customer_user_count(audit_log_extra_data)
         else:
             server_remote_realms_data = plan_data_by_remote_server_and_realm.get(server_id)
             if server_remote_realms_data is not None:
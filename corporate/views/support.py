@@ -724,24 +724,14 @@ def get_remote_servers_for_support(
     if uuid_to_search:
         remote_servers_set = {
             *remote_servers_query.filter(uuid__iexact=uuid_to_search),
-            *(
-                remote_realm.server
-                for remote_realm in RemoteRealm.objects.filter(
-                    uuid__iexact=uuid_to_search
-                ).select_related("server")
-            ),
+            *remote_servers_query.filter(remoterealm__uuid__iexact=uuid_to_search),
         }
         return sorted(remote_servers_set, key=attrgetter("deactivated"))
 
     if hostname_to_search:
         remote_servers_set = {
             *remote_servers_query.filter(hostname__icontains=hostname_to_search),
-            *(
-                remote_realm.server
-                for remote_realm in (
-                    RemoteRealm.objects.filter(host__icontains=hostname_to_search)
-                ).select_related("server")
-            ),
+            *remote_servers_query.filter(remoterealm__host__icontains=hostname_to_search),
         }
         return sorted(remote_servers_set, key=attrgetter("deactivated"))
 
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-14 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zilencer", "0067_remotepushdevicetoken_apns_case_insensitive"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="remoterealmauditlog",
+            index=models.Index(
+                condition=models.Q(
+                    ("event_type__in", [101, 102, 103, 104, 105, 201, 202, 229]),
+                    models.Q(("extra_data", {}), _negated=True),
+                ),
+                fields=["server", "realm_id", "-id"],
+                name="zilencer_remoterealmauditlog_server_realm_billing_events",
+            ),
+        ),
+    ]
@@ -1,11 +1,16 @@
+import operator
+from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import reduce
+from typing import Any
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import F, Max, Q, QuerySet, UniqueConstraint
-from django.db.models.functions import Lower
+from django.db.models import Count, F, IntegerField, Max, Q, QuerySet, Sum, UniqueConstraint
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Cast, Coalesce, Lower
 from django.utils.timezone import now as timezone_now
 from typing_extensions import override
 
@@ -21,6 +26,10 @@ from zerver.models import (
 )
 from zerver.models.realm_audit_logs import AuditLogEventType
 
+# Used in the __str__ methods of the audit log models, to avoid
+# constructing an AuditLogEventType for each call.
+AUDIT_LOG_EVENT_TYPE_NAMES = {event_type.value: event_type.name for event_type in AuditLogEventType}
+
 
 def get_remote_server_by_uuid(uuid: str) -> "RemoteZulipServer":
     try:
@@ -87,6 +96,10 @@ class RemoteZulipServer(models.Model):
     # The last time 'RemoteRealmAuditlog' was updated for this server.
     last_audit_log_update = models.DateTimeField(null=True)
 
+    # How long since last_audit_log_update before we consider the
+    # server's audit log data too stale to use for billing.
+    AUDIT_LOG_STALE_AFTER = timedelta(days=2)
+
     @override
     def __str__(self) -> str:
         return f"{self.hostname} {str(self.uuid)[0:12]}"
@@ -335,7 +348,7 @@ class RemoteZulipServerAuditLog(AbstractRealmAuditLog):
 
     @override
     def __str__(self) -> str:
-        event_type_name = AuditLogEventType(self.event_type).name
+        event_type_name = AUDIT_LOG_EVENT_TYPE_NAMES[self.event_type]
         return f"{event_type_name} {self.event_time} (id={self.id}): {self.server!r}"
 
 
@@ -363,7 +376,7 @@ class RemoteRealmAuditLog(AbstractRealmAuditLog):
 
     @override
     def __str__(self) -> str:
-        event_type_name = AuditLogEventType(self.event_type).name
+        event_type_name = AUDIT_LOG_EVENT_TYPE_NAMES[self.event_type]
         return f"{event_type_name} {self.event_time} (id={self.id}): {self.server!r}"
 
     class Meta:
@@ -393,6 +406,15 @@ class RemoteRealmAuditLog(AbstractRealmAuditLog):
                 condition=Q(event_type__in=AbstractRealmAuditLog.SYNCED_BILLING_EVENTS),
                 name="zilencer_remoterealmauditlog_synced_billing_events",
             ),
+            # Supports finding the latest audit log with user counts
+            # for each realm on a server, in
+            # get_remote_server_guest_and_non_guest_count.
+            models.Index(
+                fields=["server", "realm_id", "-id"],
+                condition=Q(event_type__in=AbstractRealmAuditLog.SYNCED_BILLING_EVENTS)
+                & ~Q(extra_data={}),
+                name="zilencer_remoterealmauditlog_server_realm_billing_events",
+            ),
         ]
 
 
@@ -527,37 +549,63 @@ class RateLimitedRemoteZulipServer(RateLimitedObject):
 
         self.uuid = str(remote_server.uuid)
         self.domain = domain
+        # These are checked on every API request from a remote server
+        # and can't change during the lifetime of this object, so we
+        # compute them once.
+        self._key = f"{type(self).__name__}:<{self.uuid}>:{self.domain}"
+        self._rules = rate_limiter_rules[self.domain]
         super().__init__()
 
     @override
     def key(self) -> str:
-        return f"{type(self).__name__}:<{self.uuid}>:{self.domain}"
+        return self._key
 
     @override
     def rules(self) -> list[tuple[int, int]]:
-        return rate_limiter_rules[self.domain]
+        return self._rules
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RemoteCustomerUserCount:
     guest_user_count: int
     non_guest_user_count: int
 
 
+# Shared result for remote customers with no audit log data; safe
+# since RemoteCustomerUserCount is immutable.
+ZERO_REMOTE_CUSTOMER_USER_COUNT = RemoteCustomerUserCount(
+    guest_user_count=0, non_guest_user_count=0
+)
+
+
+# The keys used for each role type in the ROLE_COUNT_HUMANS
+# dictionary of audit log extra_data, split into guests and everyone
+# else.
+GUEST_ROLE_COUNT_KEY = str(UserProfile.ROLE_GUEST)
+NON_GUEST_ROLE_COUNT_KEYS = tuple(
+    str(role_type) for role_type in UserProfile.ROLE_TYPES if role_type != UserProfile.ROLE_GUEST
+)
+
+# Extracts the ROLE_COUNT_HUMANS dictionary from an audit log's
+# extra_data in the database, for aggregating user counts in SQL.
+HUMANS_ROLE_COUNT_EXPRESSION = KeyTransform(
+    RemoteRealmAuditLog.ROLE_COUNT_HUMANS,
+    KeyTransform(RemoteRealmAuditLog.ROLE_COUNT, "extra_data"),
+)
+
+
 def get_remote_customer_user_count(
-    audit_logs: list[RemoteRealmAuditLog],
+    audit_log_extra_data: Iterable[dict[str, Any]],
 ) -> RemoteCustomerUserCount:
     guest_count = 0
     non_guest_count = 0
-    for log in audit_logs:
-        humans_count_dict = log.extra_data[RemoteRealmAuditLog.ROLE_COUNT][
+    for extra_data in audit_log_extra_data:
+        humans_count_dict = extra_data[RemoteRealmAuditLog.ROLE_COUNT][
             RemoteRealmAuditLog.ROLE_COUNT_HUMANS
         ]
-        for role_type in UserProfile.ROLE_TYPES:
-            if role_type == UserProfile.ROLE_GUEST:
-                guest_count += humans_count_dict.get(str(role_type), 0)
-            else:
-                non_guest_count += humans_count_dict.get(str(role_type), 0)
+        guest_count += humans_count_dict.get(GUEST_ROLE_COUNT_KEY, 0)
+        for role_key in NON_GUEST_ROLE_COUNT_KEYS:
+            non_guest_count += humans_count_dict.get(role_key, 0)
 
     return RemoteCustomerUserCount(
         non_guest_user_count=non_guest_count, guest_user_count=guest_count
@@ -584,20 +632,47 @@ def get_remote_server_guest_and_non_guest_count(
         .exclude(extra_data={})
         .values("realm_id")
         .annotate(max_id=Max("id"))
-        .values_list("max_id", flat=True)
+        .values("max_id")
     )
 
-    realm_audit_logs = RemoteRealmAuditLog.objects.filter(id__in=list(realm_last_audit_log_ids))
+    # Now we add up the user counts from the different realms. We do
+    # the arithmetic in the database, summing the per-role counts in
+    # extra_data, so that this is a single query returning just the
+    # totals. Passing the queryset (rather than a list of IDs) lets
+    # Django inline it as a subquery.
+    def role_count(role_key: str) -> Coalesce:
+        # The audit log's count of humans with this role, or 0 if
+        # there are none.
+        return Coalesce(
+            Cast(KeyTextTransform(role_key, HUMANS_ROLE_COUNT_EXPRESSION), IntegerField()), 0
+        )
 
-    # Now we add up the user counts from the different realms.
-    user_count = get_remote_customer_user_count(list(realm_audit_logs))
-    return user_count
+    user_counts = RemoteRealmAuditLog.objects.filter(id__in=realm_last_audit_log_ids).aggregate(
+        audit_log_count=Count("id"),
+        # COUNT skips NULLs, so this counts just the audit logs that
+        # have the ROLE_COUNT_HUMANS dictionary in extra_data.
+        audit_log_with_role_count_count=Count(HUMANS_ROLE_COUNT_EXPRESSION),
+        guest_user_count=Coalesce(Sum(role_count(GUEST_ROLE_COUNT_KEY)), 0),
+        non_guest_user_count=Coalesce(
+            Sum(reduce(operator.add, map(role_count, NON_GUEST_ROLE_COUNT_KEYS))), 0
+        ),
+    )
+
+    # Just as get_remote_customer_user_count would, don't silently
+    # undercount users if an audit log is missing its user counts.
+    if user_counts["audit_log_count"] != user_counts["audit_log_with_role_count_count"]:
+        raise AssertionError("Remote realm audit log is missing user role counts")
+
+    return RemoteCustomerUserCount(
+        non_guest_user_count=user_counts["non_guest_user_count"],
+        guest_user_count=user_counts["guest_user_count"],
+    )
 
 
 def get_remote_realm_guest_and_non_guest_count(
     remote_realm: RemoteRealm, event_time: datetime | None = None
 ) -> RemoteCustomerUserCount:
-    latest_audit_log = (
+    latest_audit_log_extra_data = (
         RemoteRealmAuditLog.objects.filter(
             remote_realm=remote_realm,
             event_type__in=RemoteRealmAuditLog.SYNCED_BILLING_EVENTS,
@@ -610,14 +685,15 @@ def get_remote_realm_guest_and_non_guest_count(
         # realm also generate such audit logs. Such audit logs should
         # never be the latest in a normal realm.
         .exclude(extra_data={})
-        .last()
+        .order_by("-id")
+        .values_list("extra_data", flat=True)
+        .first()
     )
 
-    if latest_audit_log is not None:
-        assert latest_audit_log is not None
-        user_count = get_remote_customer_user_count([latest_audit_log])
+    if latest_audit_log_extra_data is not None:
+        user_count = get_remote_customer_user_count([latest_audit_log_extra_data])
     else:
-        user_count = RemoteCustomerUserCount(guest_user_count=0, non_guest_user_count=0)
+        user_count = ZERO_REMOTE_CUSTOMER_USER_COUNT
     return user_count
 
 
@@ -625,7 +701,7 @@ def has_stale_audit_log(server: RemoteZulipServer) -> bool:
     if server.last_audit_log_update is None:
         return True
 
-    if timezone_now() - server.last_audit_log_update > timedelta(days=2):
+    if timezone_now() - server.last_audit_log_update > RemoteZulipServer.AUDIT_LOG_STALE_AFTER:
         return True
 
     return False